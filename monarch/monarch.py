@@ -1,19 +1,29 @@
 import asyncio
 import calendar
+import functools
 import getpass
+import hashlib
 import json
 import os
 import pickle
+import re
+import tempfile
 import time
 from datetime import datetime, date, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, IO, List, Optional, Union
 
 import oathtool
 from aiohttp import ClientSession, FormData
 from aiohttp.client import DEFAULT_TIMEOUT
-from gql import Client, gql
+from gql import Client, GraphQLRequest
+from gql.client import AsyncClientSession
 from gql.transport.aiohttp import AIOHTTPTransport
-from graphql import DocumentNode
+from graphql import DocumentNode, Source, parse
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 AUTH_HEADER_KEY = "authorization"
 CSRF_KEY = "csrftoken"
@@ -21,6 +31,36 @@ DEFAULT_RECORD_LIMIT = 100
 ERRORS_KEY = "error_code"
 SESSION_DIR = ".mm"
 SESSION_FILE = f"{SESSION_DIR}/mm_session.pickle"
+CACHE_DIR = f"{SESSION_DIR}/cache"
+CATEGORIES_CACHE_TTL = 24 * 60 * 60
+SUBSCRIPTION_CACHE_TTL = 7 * 24 * 60 * 60
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_query(request_string: str) -> DocumentNode:
+    return parse(Source(request_string, "GraphQL request"))
+
+
+def gql(request_string: str) -> GraphQLRequest:
+    """
+    Same as gql.gql, but each distinct query string is only parsed once.
+    """
+    return GraphQLRequest(_parse_query(request_string))
+
+
+def _replace_file(filename: str, mode: str, write: Callable[[IO], None]) -> None:
+    """
+    Writes a file via a uniquely named temporary file in the same directory, so a
+    crash or a concurrent writer never leaves a truncated or interleaved file.
+    """
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(filename))
+    try:
+        with os.fdopen(fd, mode) as fh:
+            write(fh)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
 
 
 class MonarchEndpoints(object):
@@ -57,6 +97,7 @@ class Monarch(object):
         session_file: str = SESSION_FILE,
         timeout: int = 10,
         token: Optional[str] = None,
+        cache_dir: Optional[str] = None,
     ) -> None:
         self._headers = {
             "Accept": "application/json",
@@ -70,6 +111,45 @@ class Monarch(object):
         self._session_file = session_file
         self._token = token
         self._timeout = timeout
+        self._cache_dir = cache_dir
+        self._keep_alive = False
+        self._graphql_client: Optional[Client] = None
+        self._graphql_session: Optional[AsyncClientSession] = None
+        self._graphql_session_headers: Optional[Dict[str, str]] = None
+        self._graphql_session_lock: Optional[asyncio.Lock] = None
+        self._retired_graphql_clients: List[Client] = []
+
+    async def __aenter__(self) -> "Monarch":
+        """
+        Reuses a single connection for all GraphQL calls made inside the
+        `async with` block instead of opening one per call.
+        """
+        self._keep_alive = True
+        # Created here rather than in __init__ so the lock belongs to the
+        # event loop running this block, not whichever loop first used it
+        self._graphql_session_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._keep_alive = False
+        await self.close()
+        self._graphql_session_lock = None
+
+    async def close(self) -> None:
+        """
+        Closes the reusable GraphQL connection, if one is open, along with any
+        connections it replaced.
+        """
+        clients = self._retired_graphql_clients
+        if self._graphql_client is not None and self._graphql_session is not None:
+            clients.append(self._graphql_client)
+        self._graphql_client = None
+        self._graphql_session = None
+        self._graphql_session_headers = None
+        self._retired_graphql_clients = []
+
+        for client in clients:
+            await client.close_async()
 
     @property
     def timeout(self) -> int:
@@ -687,15 +767,14 @@ class Monarch(object):
             raise RequestFailedException("Unable to request status of refresh")
 
         if account_ids:
+            wanted_ids = set(account_ids)
             return all(
-                [
-                    not x["hasSyncInProgress"]
-                    for x in response["accounts"]
-                    if x["id"] in account_ids
-                ]
+                not x["hasSyncInProgress"]
+                for x in response["accounts"]
+                if x["id"] in wanted_ids
             )
         else:
-            return all([not x["hasSyncInProgress"] for x in response["accounts"]])
+            return all(not x["hasSyncInProgress"] for x in response["accounts"])
 
     async def request_accounts_refresh_and_wait(
         self,
@@ -780,12 +859,13 @@ class Monarch(object):
         """
         )
 
+        today = self._get_current_date()
         variables = {
             "input": {
                 "accountIds": [str(account_id)],
-                "endDate": datetime.today().strftime("%Y-%m-%d"),
+                "endDate": today,
                 "includeHiddenHoldings": True,
-                "startDate": datetime.today().strftime("%Y-%m-%d"),
+                "startDate": today,
             },
         }
 
@@ -795,6 +875,31 @@ class Monarch(object):
             variables=variables,
         )
 
+    async def get_accounts_holdings(
+        self, account_ids: List[int], max_concurrency: int = 8
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Gets the holdings information for a list of brokerage or similar type of accounts,
+        in the same order as `account_ids`.  A failed request doesn't discard the others:
+        its exception instance is returned in that account's position instead.
+
+        :param account_ids: the IDs of the accounts to get holdings for.
+        :param max_concurrency: the maximum number of holdings requests in flight at once.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def get_holdings(account_id: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_account_holdings(account_id)
+
+        return await asyncio.gather(
+            *[get_holdings(id) for id in account_ids],
+            return_exceptions=True,
+        )
+
     async def get_account_history(self, account_id: int) -> Dict[str, Any]:
         """
         Gets historical account snapshot data for the requested account
@@ -1392,7 +1497,8 @@ class Monarch(object):
           }
         """
         )
-        return await self.gql_call(
+        return await self._cached_gql_call(
+            ttl=SUBSCRIPTION_CACHE_TTL,
             operation="GetSubscriptionDetails",
             graphql_query=query,
         )
@@ -1450,6 +1556,7 @@ class Monarch(object):
         is_recurring: Optional[bool] = None,
         imported_from_mint: Optional[bool] = None,
         synced_from_institution: Optional[bool] = None,
+        fields: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Gets transaction data from the account.
@@ -1469,26 +1576,16 @@ class Monarch(object):
         :param is_recurring: a bool to filter for whether the transactions are recurring.
         :param imported_from_mint: a bool to filter for whether the transactions were imported from mint.
         :param synced_from_institution: a bool to filter for whether the transactions were synced from an institution.
+        :param fields: a list of transaction fields to request instead of the full set, using dots for
+          nested fields, e.g. ["date", "amount", "merchant.name"]. The transaction id is always included.
         """
 
-        query = gql(
-            """
-          query GetTransactionsList($offset: Int, $limit: Int, $filters: TransactionFilterInput, $orderBy: TransactionOrdering) {
-            allTransactions(filters: $filters) {
-              totalCount
-              results(offset: $offset, limit: $limit, orderBy: $orderBy) {
-                id
-                ...TransactionOverviewFields
-                __typename
-              }
-              __typename
-            }
-            transactionRules {
-              id
-              __typename
-            }
-          }
-    
+        if fields:
+            selection = self._build_selection_set(fields)
+            fragments = ""
+        else:
+            selection = "...TransactionOverviewFields"
+            fragments = """
           fragment TransactionOverviewFields on Transaction {
             id
             amount
@@ -1538,6 +1635,27 @@ class Monarch(object):
             __typename
           }
         """
+
+        query = gql(
+            """
+          query GetTransactionsList($offset: Int, $limit: Int, $filters: TransactionFilterInput, $orderBy: TransactionOrdering) {
+            allTransactions(filters: $filters) {
+              totalCount
+              results(offset: $offset, limit: $limit, orderBy: $orderBy) {
+                id
+                %s
+                __typename
+              }
+              __typename
+            }
+            transactionRules {
+              id
+              __typename
+            }
+          }
+          %s
+        """
+            % (selection, fragments)
         )
 
         variables = {
@@ -1586,6 +1704,39 @@ class Monarch(object):
             operation="GetTransactionsList", graphql_query=query, variables=variables
         )
 
+    async def stream_transactions(
+        self,
+        limit: int = DEFAULT_RECORD_LIMIT,
+        page_size: int = DEFAULT_RECORD_LIMIT,
+        **kwargs: Any,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields transactions one at a time, fetching them in pages so the first
+        transactions are available before the rest have been downloaded.
+
+        :param limit: the maximum number of transactions to yield, defaults to DEFAULT_RECORD_LIMIT.
+        :param page_size: the number of transactions to request per call.
+        :param kwargs: any other filter accepted by `get_transactions`, e.g. start_date or fields.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        offset = kwargs.pop("offset", 0) or 0
+        remaining = limit
+        while remaining > 0:
+            page_limit = min(page_size, remaining)
+            response = await self.get_transactions(
+                limit=page_limit, offset=offset, **kwargs
+            )
+            results = response["allTransactions"]["results"]
+            for transaction in results:
+                yield transaction
+
+            if len(results) < page_limit:
+                return
+            offset += len(results)
+            remaining -= len(results)
+
     async def create_transaction(
         self,
         date: str,
@@ -1726,7 +1877,9 @@ class Monarch(object):
           }
         """
         )
-        return await self.gql_call(operation="GetCategories", graphql_query=query)
+        return await self._cached_gql_call(
+            ttl=CATEGORIES_CACHE_TTL, operation="GetCategories", graphql_query=query
+        )
 
     async def delete_transaction_category(self, category_id: str) -> bool:
         query = gql(
@@ -3728,6 +3881,27 @@ class Monarch(object):
             variables={"input": input_data},
         )
 
+    def _build_selection_set(self, fields: List[str]) -> str:
+        """
+        Builds a GraphQL selection set from a list of dotted field paths,
+        e.g. ["date", "merchant.name"] becomes "date merchant { name }".
+        """
+        tree: Dict[str, Any] = {}
+        for field in fields:
+            node = tree
+            for name in field.split("."):
+                if not re.fullmatch(r"[_A-Za-z][_0-9A-Za-z]*", name):
+                    raise ValueError(f"Invalid field: {field!r}")
+                node = node.setdefault(name, {})
+
+        def render(node: Dict[str, Any]) -> str:
+            return " ".join(
+                f"{name} {{ {render(children)} }}" if children else name
+                for name, children in node.items()
+            )
+
+        return render(tree)
+
     def _get_current_date(self) -> str:
         """
         Returns the current date as a string formatted like %Y-%m-%d.
@@ -3760,10 +3934,66 @@ class Monarch(object):
         """
         Makes a GraphQL call to Monarch's API.
         """
+        if self._keep_alive:
+            session = await self._get_graphql_session()
+            return await session.execute(
+                request=graphql_query,
+                variable_values=variables,
+                operation_name=operation,
+            )
         return await self._get_graphql_client().execute_async(
             request=graphql_query, variable_values=variables, operation_name=operation
         )
 
+    async def _cached_gql_call(
+        self,
+        ttl: int,
+        operation: str,
+        graphql_query: DocumentNode,
+        variables: Dict[str, Any] = {},
+    ) -> Dict[str, Any]:
+        """
+        Makes a GraphQL call, serving the response from the on-disk cache if
+        caching is enabled and a fresh entry exists.  Entries are keyed by the
+        session token, so logging in with a different session misses the cache.
+        """
+        if not self._cache_dir:
+            return await self.gql_call(operation, graphql_query, variables)
+
+        key = json.dumps([self._token, operation, variables], sort_keys=True)
+        filename = os.path.join(
+            self._cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".json"
+        )
+        try:
+            with open(filename, "r") as fh:
+                entry = json.load(fh)
+            if entry["expires_at"] > time.time():
+                return entry["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        data = await self.gql_call(operation, graphql_query, variables)
+
+        # The cache is only an optimization, so a failed write must not lose the response
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            entry = {"expires_at": time.time() + ttl, "data": data}
+            _replace_file(filename, "w", lambda fh: json.dump(entry, fh))
+        except OSError:
+            pass
+        return data
+
+    def clear_cache(self) -> None:
+        """
+        Deletes all cached responses, leaving any other files in the cache directory alone.
+        """
+        if not self._cache_dir or not os.path.isdir(self._cache_dir):
+            return
+
+        for name in os.listdir(self._cache_dir):
+            if re.fullmatch(r"[0-9a-f]{40}\.json", name):
+                os.remove(os.path.join(self._cache_dir, name))
+
     def save_session(self, filename: Optional[str] = None) -> None:
         """
         Saves the auth token needed to access a Monarch account.
@@ -3775,8 +4005,7 @@ class Monarch(object):
         session_data = {"token": self._token}
 
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "wb") as fh:
-            pickle.dump(session_data, fh)
+        _replace_file(filename, "wb", lambda fh: pickle.dump(session_data, fh))
 
     def load_session(self, filename: Optional[str] = None) -> None:
         """
@@ -3827,7 +4056,7 @@ class Monarch(object):
                         f"HTTP Code {resp.status}: {resp.reason}"
                     )
 
-                response = await resp.json()
+                response = await resp.json(loads=_json_loads)
                 self.set_token(response["token"])
                 self._headers["Authorization"] = f"Token {self._token}"
 
@@ -3851,7 +4080,7 @@ class Monarch(object):
             ) as resp:
                 if resp.status != 200:
                     try:
-                        response = await resp.json()
+                        response = await resp.json(loads=_json_loads)
                         if "detail" in response:
                             error_message = response["detail"]
                             raise RequireMFAException(error_message)
@@ -3864,7 +4093,7 @@ class Monarch(object):
                         raise LoginFailedException(
                             f"HTTP Code {resp.status}: {resp.reason}\nRaw response: {resp.text}"
                         )
-                response = await resp.json()
+                response = await resp.json(loads=_json_loads)
                 self.set_token(response["token"])
                 self._headers["Authorization"] = f"Token {self._token}"
 
@@ -3880,9 +4109,35 @@ class Monarch(object):
             url=MonarchEndpoints.getGraphQL(),
             headers=self._headers,
             timeout=self._timeout,
+            json_deserialize=_json_loads,
         )
         return Client(
             transport=transport,
             fetch_schema_from_transport=False,
             execute_timeout=self._timeout,
         )
+
+    async def _get_graphql_session(self) -> AsyncClientSession:
+        """
+        Returns the connected GraphQL session, opening it on first use and
+        reopening it if the auth headers changed (e.g. after a login).
+        """
+        if self._graphql_session_lock is None:
+            self._graphql_session_lock = asyncio.Lock()
+        async with self._graphql_session_lock:
+            if (
+                self._graphql_session is not None
+                and self._graphql_session_headers == self._headers
+            ):
+                return self._graphql_session
+
+            if self._graphql_session is not None:
+                # Other tasks may still have requests in flight on the old
+                # connection, so it is only closed along with the new one
+                self._retired_graphql_clients.append(self._graphql_client)
+                self._graphql_session = None
+            client = self._get_graphql_client()
+            self._graphql_session = await client.connect_async()
+            self._graphql_client = client
+            self._graphql_session_headers = dict(self._headers)
+            return self._graphql_session
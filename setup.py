@@ -1,13 +1,17 @@
-import os
+from pathlib import Path
 
 from setuptools import setup
 
-install_requires = open("requirements.txt", "r").read().split("\n")
+install_requires = [
+    line.strip()
+    for line in Path("requirements.txt").read_text().splitlines()
+    if line.strip() and not line.startswith("#")
+]
 
 setup(
     name="monarch",
     description="Monarch API for Python",
-    long_description=open("README.md", "r").read(),
+    long_description=Path("README.md").read_text(encoding="utf-8"),
     long_description_content_type="text/markdown",
     url="https://github.com/hammem/monarch",
     author="hammem",
@@ -15,6 +19,9 @@ setup(
     license="MIT",
     keywords="monarch, financial, personal finance",
     install_requires=install_requires,
+    extras_require={
+        "fast": ["orjson", 'uvloop; platform_system != "Windows"'],
+    },
     packages=["monarch"],
     include_package_data=True,
     zip_safe=False,
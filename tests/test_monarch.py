@@ -1,39 +1,313 @@
+import asyncio
+import itertools
 import os
-import pickle
+import sys
+import tempfile
+import time
 import unittest
-from unittest.mock import patch
+from operator import itemgetter
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
-import json
 from gql import Client
+from graphql import parse, print_ast
 from monarch import Monarch
 from monarch.monarch import LoginFailedException
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+_get_operation_and_variables = itemgetter("operation_name", "variable_values")
+
+_HERE = os.path.dirname(os.path.realpath(__file__))
+_FIXTURES = {
+    path.name: json_loads(path.read_bytes()) for path in Path(_HERE).glob("*.json")
+}
+
+# (method name, args, kwargs, expected operation name, expected variables)
+RECEIPT_AND_ORDERING_CASES = (
+    (
+        "add_transaction_attachment",
+        ({"transactionId": "txn-1", "publicId": "pub-1"},),
+        {},
+        "Common_AddTransactionAttachment",
+        {"input": {"transactionId": "txn-1", "publicId": "pub-1"}},
+    ),
+    (
+        "complete_retail_sync",
+        ("sync-1",),
+        {},
+        "Common_CompleteRetailSync",
+        {"syncId": "sync-1"},
+    ),
+    (
+        "create_retail_sync",
+        ({"vendor": "amazon"},),
+        {},
+        "Common_CreateRetailSync",
+        {"input": {"vendor": "amazon"}},
+    ),
+    (
+        "delete_retail_sync",
+        ("sync-2",),
+        {},
+        "Common_DeleteRetailSync",
+        {"syncId": "sync-2"},
+    ),
+    (
+        "get_transaction_attachment_upload_info",
+        ("11111111-1111-1111-1111-111111111111",),
+        {},
+        "Common_GetTransactionAttachmentUploadInfo",
+        {"transactionId": "11111111-1111-1111-1111-111111111111"},
+    ),
+    (
+        "match_retail_transaction",
+        ("retail-1", "txn-2"),
+        {},
+        "Common_MatchRetailTransaction",
+        {"retailTransactionId": "retail-1", "transactionId": "txn-2"},
+    ),
+    (
+        "start_retail_sync",
+        ("sync-3",),
+        {},
+        "Common_StartRetailSync",
+        {"syncId": "sync-3"},
+    ),
+    (
+        "update_account_group_order",
+        ({"order": ["asset", "liability"]},),
+        {},
+        "Common_UpdateAccountGroupOrder",
+        {"input": {"order": ["asset", "liability"]}},
+    ),
+    (
+        "update_retail_order",
+        ({"id": "order-1", "merchantName": "Target"},),
+        {},
+        "Common_UpdateRetailOrder",
+        {"input": {"id": "order-1", "merchantName": "Target"}},
+    ),
+    (
+        "update_retail_vendor_settings",
+        ({"vendor": "amazon", "shouldCategorizeAndSplitTransactions": True},),
+        {},
+        "Common_UpdateRetailVendorSettings",
+        {
+            "input": {
+                "vendor": "amazon",
+                "shouldCategorizeAndSplitTransactions": True,
+            }
+        },
+    ),
+    (
+        "update_transaction_tag_order",
+        ("tag-1", 4),
+        {},
+        "Common_UpdateTransactionTagOrder",
+        {"tagId": "tag-1", "order": 4},
+    ),
+    (
+        "delete_transaction_attachment_mobile",
+        ("22222222-2222-2222-2222-222222222222",),
+        {},
+        "Mobile_DeleteAttachment",
+        {"attachmentId": "22222222-2222-2222-2222-222222222222"},
+    ),
+    (
+        "update_category_group_order_mobile",
+        ("33333333-3333-3333-3333-333333333333", 3),
+        {},
+        "Mobile_UpdateCategoryGroupOrderMutation",
+        {"id": "33333333-3333-3333-3333-333333333333", "order": 3},
+    ),
+    (
+        "update_category_order_mobile",
+        (
+            "44444444-4444-4444-4444-444444444444",
+            "55555555-5555-5555-5555-555555555555",
+            2,
+        ),
+        {},
+        "Mobile_UpdateCategoryOrderMutation",
+        {
+            "id": "44444444-4444-4444-4444-444444444444",
+            "categoryGroupId": "55555555-5555-5555-5555-555555555555",
+            "order": 2,
+        },
+    ),
+    (
+        "cancel_subscription_sponsorship",
+        ({"subscriptionSponsorshipId": "sponsor-1"},),
+        {},
+        "Web_BillingSettingsCancelSponsorship",
+        {"input": {"subscriptionSponsorshipId": "sponsor-1"}},
+    ),
+    (
+        "delete_transaction_attachment_web",
+        ("66666666-6666-6666-6666-666666666666",),
+        {},
+        "Web_TransactionDrawerDeleteAttachment",
+        {"id": "66666666-6666-6666-6666-666666666666"},
+    ),
+    (
+        "update_account_order",
+        ({"id": "acct-1", "order": 1},),
+        {},
+        "Web_UpdateAccountOrder",
+        {"input": {"id": "acct-1", "order": 1}},
+    ),
+    (
+        "update_category_group_order_web",
+        ("77777777-7777-7777-7777-777777777777", 1),
+        {},
+        "Web_UpdateCategoryGroupOrder",
+        {"id": "77777777-7777-7777-7777-777777777777", "order": 1},
+    ),
+    (
+        "update_category_order_web",
+        (
+            "88888888-8888-8888-8888-888888888888",
+            "99999999-9999-9999-9999-999999999999",
+            5,
+        ),
+        {},
+        "Web_UpdateCategoryOrder",
+        {
+            "id": "88888888-8888-8888-8888-888888888888",
+            "categoryGroupId": "99999999-9999-9999-9999-999999999999",
+            "order": 5,
+        },
+    ),
+    (
+        "update_dismissed_retail_sync_banner",
+        (True, "2026-02-19T00:00:00Z"),
+        {},
+        "Web_UpdateDismissedRetailSyncBanner",
+        {
+            "dismissedRetailSyncBanner": True,
+            "dismissedRetailSyncTargetBannerAt": "2026-02-19T00:00:00Z",
+        },
+    ),
+    (
+        "update_transaction_rule_order",
+        ("rule-1", 7),
+        {},
+        "Web_UpdateRuleOrderMutation",
+        {"id": "rule-1", "order": 7},
+    ),
+    (
+        "get_retail_extension_settings",
+        (),
+        {},
+        "Common_GetRetailExtensionSettings",
+        {},
+    ),
+    (
+        "get_retail_sync",
+        ("sync-4",),
+        {},
+        "Common_RetailSyncQuery",
+        {"syncId": "sync-4"},
+    ),
+    (
+        "get_retail_syncs_with_total",
+        (),
+        {
+            "filters": {"status": "completed"},
+            "offset": 5,
+            "limit": 10,
+            "include_total_count": True,
+        },
+        "Common_RetailSyncsQueryWithTotal",
+        {
+            "filters": {"status": "completed"},
+            "offset": 5,
+            "limit": 10,
+            "includeTotalCount": True,
+        },
+    ),
+    (
+        "get_transaction_attachment",
+        ("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",),
+        {},
+        "Mobile_GetAttachmentDetails",
+        {"attachmentId": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"},
+    ),
+    (
+        "get_user_dismissed_retail_sync_banner",
+        (),
+        {},
+        "Web_GetUserDismissedRetailSyncBanner",
+        {},
+    ),
+    (
+        "get_user_has_configured_extension",
+        (),
+        {},
+        "Web_GetUserHasConfiguredExtension",
+        {},
+    ),
+)
+
 
 class TestMonarch(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Patches Client.execute_async and sets up one event loop for every
+        test in this class.
+        """
+        super().setUpClass()
+        patcher = patch.object(Client, "execute_async", new_callable=AsyncMock)
+        cls.mock_execute_async = patcher.start()
+        cls.addClassCleanup(patcher.stop)
+
+        if sys.version_info >= (3, 11):
+            cls._shared_asyncio_runner = asyncio.Runner(debug=True)
+            cls.addClassCleanup(cls._shared_asyncio_runner.close)
+
+    def _setupAsyncioRunner(self):
+        """
+        Runs every test on the class's shared event loop instead of creating
+        and closing a new one per test (Python 3.11+).
+        """
+        self._asyncioRunner = self._shared_asyncio_runner
+
+    def _tearDownAsyncioRunner(self):
+        """
+        Cancels any tasks a test left pending, as closing the runner would,
+        but keeps the shared event loop open for the next test.
+        """
+        loop = self._asyncioRunner.get_loop()
+        tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        if not tasks:
+            return
+
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
     def setUp(self):
         """
         Set up any necessary data or variables for the tests here.
         This method will be called before each test method is executed.
         """
-        with open("temp_session.pickle", "wb") as fh:
-            session_data = {
-                "cookies": {"test_cookie": "test_value"},
-                "token": "test_token",
-            }
-            pickle.dump(session_data, fh)
-        self.monarch_money = Monarch()
-        self.monarch_money.load_session("temp_session.pickle")
+        self.mock_execute_async.reset_mock(return_value=True, side_effect=True)
+        self.monarch_money = Monarch(token="test_token")
 
-    @patch.object(Client, "execute_async")
-    async def test_get_accounts(self, mock_execute_async):
+    async def test_get_accounts(self):
         """
         Test the get_accounts method.
         """
-        mock_execute_async.return_value = TestMonarch.loadTestData(
+        self.mock_execute_async.return_value = TestMonarch.loadTestData(
             filename="get_accounts.json",
         )
         result = await self.monarch_money.get_accounts()
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
         self.assertIsNotNone(result, "Expected result to not be None")
         self.assertEqual(len(result["accounts"]), 7, "Expected 7 accounts")
         self.assertEqual(
@@ -75,16 +349,29 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
             "Expected type name to be 'loan'",
         )
 
-    @patch.object(Client, "execute_async")
-    async def test_get_transactions_summary(self, mock_execute_async):
+    async def test_query_documents_are_parsed_once(self):
+        """
+        Test that repeated calls reuse the parsed query document.
+        """
+        self.mock_execute_async.return_value = {}
+        await self.monarch_money.get_subscription_details()
+        await self.monarch_money.get_subscription_details()
+
+        first, second = self.mock_execute_async.call_args_list
+        self.assertIsNot(first.kwargs["request"], second.kwargs["request"])
+        self.assertIs(
+            first.kwargs["request"].document, second.kwargs["request"].document
+        )
+
+    async def test_get_transactions_summary(self):
         """
         Test the get_transactions_summary method.
         """
-        mock_execute_async.return_value = TestMonarch.loadTestData(
+        self.mock_execute_async.return_value = TestMonarch.loadTestData(
             filename="get_transactions_summary.json",
         )
         result = await self.monarch_money.get_transactions_summary()
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
         self.assertIsNotNone(result, "Expected result to not be None")
         self.assertEqual(
             result["aggregates"][0]["summary"]["sumIncome"],
@@ -92,13 +379,12 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
             "Expected sumIncome to be 50000",
         )
 
-    @patch.object(Client, "execute_async")
-    async def test_delete_account(self, mock_execute_async):
+    async def test_delete_account(self):
         """
         Test the delete_account method.
         """
 
-        mock_execute_async.return_value = {
+        self.mock_execute_async.return_value = {
             "deleteAccount": {
                 "deleted": True,
                 "errors": None,
@@ -108,23 +394,23 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
 
         result = await self.monarch_money.delete_account("170123456789012345")
 
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
 
-        kwargs = mock_execute_async.call_args.kwargs
-        self.assertEqual(kwargs["operation_name"], "Common_DeleteAccount")
-        self.assertEqual(kwargs["variable_values"], {"id": "170123456789012345"})
+        self.assertEqual(
+            _get_operation_and_variables(self.mock_execute_async.call_args.kwargs),
+            ("Common_DeleteAccount", {"id": "170123456789012345"}),
+        )
 
         self.assertIsNotNone(result, "Expected result to not be None")
         self.assertEqual(result["deleteAccount"]["deleted"], True)
         self.assertEqual(result["deleteAccount"]["errors"], None)
 
-    @patch.object(Client, "execute_async")
-    async def test_get_account_type_options(self, mock_execute_async):
+    async def test_get_account_type_options(self):
         """
         Test the get_account_type_options method.
         """
         # Mock the execute_async method to return a test result
-        mock_execute_async.return_value = TestMonarch.loadTestData(
+        self.mock_execute_async.return_value = TestMonarch.loadTestData(
             filename="get_account_type_options.json",
         )
 
@@ -132,7 +418,7 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
         result = await self.monarch_money.get_account_type_options()
 
         # Assert that the execute_async method was called once
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
 
         # Assert that the result is not None
         self.assertIsNotNone(result, "Expected result to not be None")
@@ -157,13 +443,12 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
             "Expected third account type option name to be 'real_estate'",
         )
 
-    @patch.object(Client, "execute_async")
-    async def test_get_account_holdings(self, mock_execute_async):
+    async def test_get_account_holdings(self):
         """
         Test the get_account_holdings method.
         """
         # Mock the execute_async method to return a test result
-        mock_execute_async.return_value = TestMonarch.loadTestData(
+        self.mock_execute_async.return_value = TestMonarch.loadTestData(
             filename="get_account_holdings.json",
         )
 
@@ -171,7 +456,7 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
         result = await self.monarch_money.get_account_holdings(account_id=1234)
 
         # Assert that the execute_async method was called once
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
 
         # Assert that the result is not None
         self.assertIsNotNone(result, "Expected result to not be None")
@@ -200,18 +485,44 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
             "Expected third holding name to be 'U S Dollar'",
         )
 
-    @patch.object(Client, "execute_async")
-    async def test_get_budgets(self, mock_execute_async):
+    async def test_get_accounts_holdings(self):
+        """
+        Test the get_accounts_holdings method.
+        """
+        holdings = TestMonarch.loadTestData(filename="get_account_holdings.json")
+        self.mock_execute_async.side_effect = [holdings, Exception("boom"), holdings]
+
+        result = await self.monarch_money.get_accounts_holdings(
+            account_ids=[1, 2, 3], max_concurrency=1
+        )
+
+        self.assertEqual(self.mock_execute_async.call_count, 3)
+        requested_ids = [
+            call.kwargs["variable_values"]["input"]["accountIds"]
+            for call in self.mock_execute_async.call_args_list
+        ]
+        self.assertEqual(requested_ids, [["1"], ["2"], ["3"]])
+        self.assertEqual(result[0], holdings)
+        self.assertIsInstance(result[1], Exception)
+        self.assertEqual(result[2], holdings)
+
+        with self.assertRaises(ValueError):
+            await self.monarch_money.get_accounts_holdings(
+                account_ids=[1], max_concurrency=0
+            )
+        self.assertEqual(self.mock_execute_async.call_count, 3)
+
+    async def test_get_budgets(self):
         """
         Test the get_accounts method.
         """
-        mock_execute_async.return_value = TestMonarch.loadTestData(
+        self.mock_execute_async.return_value = TestMonarch.loadTestData(
             filename="get_budgets.json",
         )
         result = await self.monarch_money.get_budgets(
             start_date="2024-12-01", end_date="2025-2-31"
         )
-        mock_execute_async.assert_called_once()
+        self.mock_execute_async.assert_called_once()
         self.assertIsNotNone(result, "Expected result to not be None")
         self.assertEqual(
             len(result["budgetData"]["monthlyAmountsByCategory"]),
@@ -221,251 +532,295 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(result["categoryGroups"]), 2, "Expected 2 category groups")
         self.assertEqual(len(result["goalsV2"]), 1, "Expected 1 goal")
 
-    @patch.object(Client, "execute_async")
-    async def test_receipt_and_ordering_endpoints(self, mock_execute_async):
+    async def test_get_transactions_with_fields(self):
+        """
+        Test that get_transactions only requests the given fields.
+        """
+        self.mock_execute_async.return_value = {}
+        await self.monarch_money.get_transactions(
+            limit=5,
+            fields=["date", "amount", "merchant.name", "category.name", "category.id"],
+        )
+        kwargs = self.mock_execute_async.call_args.kwargs
+        self.assertEqual(kwargs["operation_name"], "GetTransactionsList")
+        self.assertEqual(kwargs["variable_values"]["limit"], 5)
+        expected = parse("""
+            query GetTransactionsList($offset: Int, $limit: Int, $filters: TransactionFilterInput, $orderBy: TransactionOrdering) {
+              allTransactions(filters: $filters) {
+                totalCount
+                results(offset: $offset, limit: $limit, orderBy: $orderBy) {
+                  id
+                  date
+                  amount
+                  merchant { name }
+                  category { name id }
+                  __typename
+                }
+                __typename
+              }
+              transactionRules {
+                id
+                __typename
+              }
+            }
+            """)
+        self.assertEqual(print_ast(kwargs["request"].document), print_ast(expected))
+
+        await self.monarch_money.get_transactions(limit=5)
+        query = print_ast(self.mock_execute_async.call_args.kwargs["request"].document)
+        self.assertIn("...TransactionOverviewFields", query)
+        self.assertIn("fragment TransactionOverviewFields on Transaction", query)
+        self.assertIn("transactionRules", query)
+
+        for field in ("", "merchant.", "merchant.na{me", "1date", "date amount"):
+            with self.subTest(field=field):
+                with self.assertRaises(ValueError):
+                    await self.monarch_money.get_transactions(fields=[field])
+        self.assertEqual(self.mock_execute_async.call_count, 2)
+
+    async def test_stream_transactions(self):
+        """
+        Test that stream_transactions pages through get_transactions.
+        """
+        self.mock_execute_async.side_effect = [
+            {"allTransactions": {"results": [{"id": "1"}, {"id": "2"}]}},
+            {"allTransactions": {"results": [{"id": "3"}]}},
+        ]
+
+        ids = [
+            transaction["id"]
+            async for transaction in self.monarch_money.stream_transactions(
+                limit=5, page_size=2
+            )
+        ]
+
+        self.assertEqual(ids, ["1", "2", "3"])
+        pages = [
+            (
+                call.kwargs["variable_values"]["offset"],
+                call.kwargs["variable_values"]["limit"],
+            )
+            for call in self.mock_execute_async.call_args_list
+        ]
+        self.assertEqual(pages, [(0, 2), (2, 2)])
+
+    async def test_stream_transactions_invalid_page_size(self):
+        """
+        Test that stream_transactions rejects a page size below 1.
+        """
+        for page_size in (0, -1):
+            with self.subTest(page_size=page_size):
+                with self.assertRaises(ValueError):
+                    async for _ in self.monarch_money.stream_transactions(
+                        limit=5, page_size=page_size
+                    ):
+                        pass
+        self.mock_execute_async.assert_not_called()
+
+    async def test_get_transaction_categories_cached(self):
+        """
+        Test that get_transaction_categories is served from the on-disk cache.
+        """
+        self.mock_execute_async.return_value = {"categories": [{"id": "1"}]}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            monarch_money = Monarch(token="test_token", cache_dir=cache_dir)
+
+            first = await monarch_money.get_transaction_categories()
+            second = await monarch_money.get_transaction_categories()
+            self.mock_execute_async.assert_called_once()
+            self.assertEqual(first, second)
+
+            unrelated = os.path.join(cache_dir, "package.json")
+            with open(unrelated, "w") as fh:
+                fh.write("{}")
+
+            monarch_money.clear_cache()
+            self.assertEqual(os.listdir(cache_dir), ["package.json"])
+            await monarch_money.get_transaction_categories()
+            self.assertEqual(self.mock_execute_async.call_count, 2)
+
+    async def test_get_transaction_categories_cache_misses(self):
+        """
+        Test that expired entries, entries for another session and malformed
+        entries are all fetched again from the API.
+        """
+        self.mock_execute_async.return_value = {"categories": [{"id": "1"}]}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            monarch_money = Monarch(token="test_token", cache_dir=cache_dir)
+            await monarch_money.get_transaction_categories()
+            self.assertEqual(self.mock_execute_async.call_count, 1)
+
+            with patch("time.time", return_value=time.time() + 2 * 24 * 60 * 60):
+                await monarch_money.get_transaction_categories()
+            self.assertEqual(self.mock_execute_async.call_count, 2)
+
+            other_monarch_money = Monarch(token="other_token", cache_dir=cache_dir)
+            await other_monarch_money.get_transaction_categories()
+            self.assertEqual(self.mock_execute_async.call_count, 3)
+
+            for malformed in ("[1]", '{"expires_at": null}'):
+                for name in os.listdir(cache_dir):
+                    with open(os.path.join(cache_dir, name), "w") as fh:
+                        fh.write(malformed)
+                await monarch_money.get_transaction_categories()
+            self.assertEqual(self.mock_execute_async.call_count, 5)
+
+    async def test_get_transaction_categories_unwritable_cache(self):
+        """
+        Test that a cache directory that can't be written to doesn't lose the response.
+        """
+        self.mock_execute_async.return_value = {"categories": [{"id": "1"}]}
+        with tempfile.NamedTemporaryFile() as not_a_dir:
+            monarch_money = Monarch(token="test_token", cache_dir=not_a_dir.name)
+            result = await monarch_money.get_transaction_categories()
+        self.assertEqual(result, {"categories": [{"id": "1"}]})
+
+    @patch.object(Client, "close_async")
+    @patch.object(Client, "connect_async")
+    async def test_context_manager_reuses_connection(
+        self, mock_connect_async, mock_close_async
+    ):
+        """
+        Test that calls made inside `async with` share a single connection.
+        """
+        mock_session = mock_connect_async.return_value
+        mock_session.execute = AsyncMock(return_value={})
+
+        async with self.monarch_money as mm:
+            await mm.get_accounts()
+            await mm.get_subscription_details()
+            mock_connect_async.assert_called_once()
+            self.assertEqual(mock_session.execute.call_count, 2)
+
+            mm.set_token("other_token")
+            mm._headers["Authorization"] = "Token other_token"
+            await mm.get_accounts()
+            self.assertEqual(mock_connect_async.call_count, 2)
+
+        self.assertEqual(mock_close_async.call_count, 2)
+
+    @patch.object(Client, "close_async")
+    @patch.object(Client, "connect_async")
+    async def test_context_manager_header_change_during_request(
+        self, mock_connect_async, mock_close_async
+    ):
+        """
+        Test that changing the auth headers doesn't close the connection under
+        a request that is still in flight.
+        """
+        release = asyncio.Event()
+
+        async def slow_execute(**kwargs):
+            await release.wait()
+            mock_close_async.assert_not_called()
+            return {}
+
+        old_session, new_session = AsyncMock(), AsyncMock()
+        old_session.execute.side_effect = slow_execute
+        new_session.execute.return_value = {}
+        mock_connect_async.side_effect = [old_session, new_session]
+
+        async with self.monarch_money as mm:
+            in_flight = asyncio.create_task(mm.get_accounts())
+            while not old_session.execute.called:
+                await asyncio.sleep(0)
+
+            mm.set_token("other_token")
+            mm._headers["Authorization"] = "Token other_token"
+            await mm.get_accounts()
+            new_session.execute.assert_called_once()
+            mock_close_async.assert_not_called()
+
+            release.set()
+            await in_flight
+
+        self.assertEqual(mock_close_async.call_count, 2)
+
+    @patch.object(Client, "close_async")
+    @patch.object(Client, "connect_async")
+    def test_context_manager_across_event_loops(
+        self, mock_connect_async, mock_close_async
+    ):
+        """
+        Test that one instance can be used as a context manager under
+        successive event loops, e.g. repeated asyncio.run() calls.
+        """
+        mock_session = AsyncMock()
+        mock_session.execute.return_value = {}
+
+        async def connect_async(*args, **kwargs):
+            # Yield so the concurrent call below has to wait on the lock
+            await asyncio.sleep(0)
+            return mock_session
+
+        mock_connect_async.side_effect = connect_async
+
+        async def run():
+            async with self.monarch_money as mm:
+                await asyncio.gather(mm.get_accounts(), mm.get_accounts())
+
+        asyncio.run(run())
+        asyncio.run(run())
+        self.assertEqual(mock_connect_async.call_count, 2)
+        self.assertEqual(mock_session.execute.call_count, 4)
+
+    async def test_receipt_and_ordering_endpoints(self):
         """
         Ensures new receipt/ordering endpoint wrappers call the expected
         GraphQL operation names and variables.
         """
-        mock_execute_async.return_value = {}
+        self.mock_execute_async.side_effect = itertools.repeat({})
 
-        cases = [
-            (
-                "add_transaction_attachment",
-                "Common_AddTransactionAttachment",
-                {"input": {"transactionId": "txn-1", "publicId": "pub-1"}},
-                lambda: self.monarch_money.add_transaction_attachment(
-                    {"transactionId": "txn-1", "publicId": "pub-1"}
-                ),
-            ),
-            (
-                "complete_retail_sync",
-                "Common_CompleteRetailSync",
-                {"syncId": "sync-1"},
-                lambda: self.monarch_money.complete_retail_sync("sync-1"),
-            ),
-            (
-                "create_retail_sync",
-                "Common_CreateRetailSync",
-                {"input": {"vendor": "amazon"}},
-                lambda: self.monarch_money.create_retail_sync({"vendor": "amazon"}),
-            ),
-            (
-                "delete_retail_sync",
-                "Common_DeleteRetailSync",
-                {"syncId": "sync-2"},
-                lambda: self.monarch_money.delete_retail_sync("sync-2"),
-            ),
-            (
-                "get_transaction_attachment_upload_info",
-                "Common_GetTransactionAttachmentUploadInfo",
-                {"transactionId": "11111111-1111-1111-1111-111111111111"},
-                lambda: self.monarch_money.get_transaction_attachment_upload_info(
-                    "11111111-1111-1111-1111-111111111111"
-                ),
-            ),
-            (
-                "match_retail_transaction",
-                "Common_MatchRetailTransaction",
-                {"retailTransactionId": "retail-1", "transactionId": "txn-2"},
-                lambda: self.monarch_money.match_retail_transaction(
-                    "retail-1", "txn-2"
-                ),
-            ),
-            (
-                "start_retail_sync",
-                "Common_StartRetailSync",
-                {"syncId": "sync-3"},
-                lambda: self.monarch_money.start_retail_sync("sync-3"),
-            ),
-            (
-                "update_account_group_order",
-                "Common_UpdateAccountGroupOrder",
-                {"input": {"order": ["asset", "liability"]}},
-                lambda: self.monarch_money.update_account_group_order(
-                    {"order": ["asset", "liability"]}
-                ),
-            ),
-            (
-                "update_retail_order",
-                "Common_UpdateRetailOrder",
-                {"input": {"id": "order-1", "merchantName": "Target"}},
-                lambda: self.monarch_money.update_retail_order(
-                    {"id": "order-1", "merchantName": "Target"}
-                ),
-            ),
-            (
-                "update_retail_vendor_settings",
-                "Common_UpdateRetailVendorSettings",
-                {
-                    "input": {
-                        "vendor": "amazon",
-                        "shouldCategorizeAndSplitTransactions": True,
-                    }
-                },
-                lambda: self.monarch_money.update_retail_vendor_settings(
-                    {
-                        "vendor": "amazon",
-                        "shouldCategorizeAndSplitTransactions": True,
-                    }
-                ),
-            ),
-            (
-                "update_transaction_tag_order",
-                "Common_UpdateTransactionTagOrder",
-                {"tagId": "tag-1", "order": 4},
-                lambda: self.monarch_money.update_transaction_tag_order("tag-1", 4),
-            ),
-            (
-                "delete_transaction_attachment_mobile",
-                "Mobile_DeleteAttachment",
-                {"attachmentId": "22222222-2222-2222-2222-222222222222"},
-                lambda: self.monarch_money.delete_transaction_attachment_mobile(
-                    "22222222-2222-2222-2222-222222222222"
-                ),
-            ),
-            (
-                "update_category_group_order_mobile",
-                "Mobile_UpdateCategoryGroupOrderMutation",
-                {"id": "33333333-3333-3333-3333-333333333333", "order": 3},
-                lambda: self.monarch_money.update_category_group_order_mobile(
-                    "33333333-3333-3333-3333-333333333333", 3
-                ),
-            ),
-            (
-                "update_category_order_mobile",
-                "Mobile_UpdateCategoryOrderMutation",
-                {
-                    "id": "44444444-4444-4444-4444-444444444444",
-                    "categoryGroupId": "55555555-5555-5555-5555-555555555555",
-                    "order": 2,
-                },
-                lambda: self.monarch_money.update_category_order_mobile(
-                    "44444444-4444-4444-4444-444444444444",
-                    "55555555-5555-5555-5555-555555555555",
-                    2,
-                ),
-            ),
-            (
-                "cancel_subscription_sponsorship",
-                "Web_BillingSettingsCancelSponsorship",
-                {"input": {"subscriptionSponsorshipId": "sponsor-1"}},
-                lambda: self.monarch_money.cancel_subscription_sponsorship(
-                    {"subscriptionSponsorshipId": "sponsor-1"}
-                ),
-            ),
-            (
-                "delete_transaction_attachment_web",
-                "Web_TransactionDrawerDeleteAttachment",
-                {"id": "66666666-6666-6666-6666-666666666666"},
-                lambda: self.monarch_money.delete_transaction_attachment_web(
-                    "66666666-6666-6666-6666-666666666666"
-                ),
-            ),
-            (
-                "update_account_order",
-                "Web_UpdateAccountOrder",
-                {"input": {"id": "acct-1", "order": 1}},
-                lambda: self.monarch_money.update_account_order(
-                    {"id": "acct-1", "order": 1}
-                ),
-            ),
-            (
-                "update_category_group_order_web",
-                "Web_UpdateCategoryGroupOrder",
-                {"id": "77777777-7777-7777-7777-777777777777", "order": 1},
-                lambda: self.monarch_money.update_category_group_order_web(
-                    "77777777-7777-7777-7777-777777777777", 1
-                ),
-            ),
-            (
-                "update_category_order_web",
-                "Web_UpdateCategoryOrder",
-                {
-                    "id": "88888888-8888-8888-8888-888888888888",
-                    "categoryGroupId": "99999999-9999-9999-9999-999999999999",
-                    "order": 5,
-                },
-                lambda: self.monarch_money.update_category_order_web(
-                    "88888888-8888-8888-8888-888888888888",
-                    "99999999-9999-9999-9999-999999999999",
-                    5,
-                ),
-            ),
-            (
-                "update_dismissed_retail_sync_banner",
-                "Web_UpdateDismissedRetailSyncBanner",
-                {
-                    "dismissedRetailSyncBanner": True,
-                    "dismissedRetailSyncTargetBannerAt": "2026-02-19T00:00:00Z",
-                },
-                lambda: self.monarch_money.update_dismissed_retail_sync_banner(
-                    True, "2026-02-19T00:00:00Z"
-                ),
-            ),
-            (
-                "update_transaction_rule_order",
-                "Web_UpdateRuleOrderMutation",
-                {"id": "rule-1", "order": 7},
-                lambda: self.monarch_money.update_transaction_rule_order("rule-1", 7),
-            ),
-            (
-                "get_retail_extension_settings",
-                "Common_GetRetailExtensionSettings",
-                {},
-                lambda: self.monarch_money.get_retail_extension_settings(),
-            ),
-            (
-                "get_retail_sync",
-                "Common_RetailSyncQuery",
-                {"syncId": "sync-4"},
-                lambda: self.monarch_money.get_retail_sync("sync-4"),
-            ),
-            (
-                "get_retail_syncs_with_total",
-                "Common_RetailSyncsQueryWithTotal",
-                {
-                    "filters": {"status": "completed"},
-                    "offset": 5,
-                    "limit": 10,
-                    "includeTotalCount": True,
-                },
-                lambda: self.monarch_money.get_retail_syncs_with_total(
-                    filters={"status": "completed"},
-                    offset=5,
-                    limit=10,
-                    include_total_count=True,
-                ),
-            ),
-            (
-                "get_transaction_attachment",
-                "Mobile_GetAttachmentDetails",
-                {"attachmentId": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"},
-                lambda: self.monarch_money.get_transaction_attachment(
-                    "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
-                ),
-            ),
-            (
-                "get_user_dismissed_retail_sync_banner",
-                "Web_GetUserDismissedRetailSyncBanner",
-                {},
-                lambda: self.monarch_money.get_user_dismissed_retail_sync_banner(),
-            ),
-            (
-                "get_user_has_configured_extension",
-                "Web_GetUserHasConfiguredExtension",
-                {},
-                lambda: self.monarch_money.get_user_has_configured_extension(),
-            ),
+        for method_name, args, kwargs, _, _ in RECEIPT_AND_ORDERING_CASES:
+            await getattr(self.monarch_money, method_name)(*args, **kwargs)
+
+        expected = [
+            (method_name, expected_operation, expected_variables)
+            for method_name, _, _, expected_operation, expected_variables in (
+                RECEIPT_AND_ORDERING_CASES
+            )
+        ]
+        actual = [
+            (method_name, *_get_operation_and_variables(call.kwargs))
+            for (method_name, *_), call in zip(
+                RECEIPT_AND_ORDERING_CASES, self.mock_execute_async.call_args_list
+            )
         ]
+        self.assertEqual(
+            self.mock_execute_async.call_count, len(RECEIPT_AND_ORDERING_CASES)
+        )
+        self.assertEqual(actual, expected)
+
+    def test_save_session(self):
+        """
+        Test that save_session writes a session load_session can read back.
+        """
+        with tempfile.TemporaryDirectory() as session_dir:
+            filename = os.path.join(session_dir, "mm_session.pickle")
+            self.monarch_money.save_session(filename)
+            self.assertEqual(os.listdir(session_dir), ["mm_session.pickle"])
+
+            monarch_money = Monarch()
+            monarch_money.load_session(filename)
+            self.assertEqual(monarch_money.token, "test_token")
+
+    def test_save_session_failure_keeps_previous_session(self):
+        """
+        Test that a failed save_session leaves the previous session and no temporary files.
+        """
+        with tempfile.TemporaryDirectory() as session_dir:
+            filename = os.path.join(session_dir, "mm_session.pickle")
+            self.monarch_money.save_session(filename)
 
-        for case_name, expected_operation, expected_variables, invoke in cases:
-            with self.subTest(case=case_name):
-                mock_execute_async.reset_mock()
-                await invoke()
-                kwargs = mock_execute_async.call_args.kwargs
-                self.assertEqual(kwargs["operation_name"], expected_operation)
-                self.assertEqual(kwargs["variable_values"], expected_variables)
+            self.monarch_money.set_token("other_token")
+            with patch("pickle.dump", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    self.monarch_money.save_session(filename)
+            self.assertEqual(os.listdir(session_dir), ["mm_session.pickle"])
+
+            monarch_money = Monarch()
+            monarch_money.load_session(filename)
+            self.assertEqual(monarch_money.token, "test_token")
 
     async def test_login(self):
         """
@@ -489,16 +844,11 @@ class TestMonarch(unittest.IsolatedAsyncioTestCase):
 
     @classmethod
     def loadTestData(cls, filename) -> dict:
-        filename = f"{os.path.dirname(os.path.realpath(__file__))}/{filename}"
-        with open(filename, "r") as file:
-            return json.load(file)
-
-    def tearDown(self):
         """
-        Tear down any necessary data or variables for the tests here.
-        This method will be called after each test method is executed.
+        Returns a JSON fixture, parsed once at import time.
+        Fixtures are shared between tests, so tests must not mutate them.
         """
-        self.monarch_money.delete_session("temp_session.pickle")
+        return _FIXTURES[filename]
 
 
 if __name__ == "__main__":